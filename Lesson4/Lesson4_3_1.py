@@ -1,22 +1,42 @@
 from playwright.sync_api import sync_playwright
 import os
-from time import sleep
+
+# 設定環境變數 DEMO=1 時開啟瀏覽器視窗，逐欄填寫並放慢動作，方便觀察
+DEMO = os.environ.get("DEMO") == "1"
 
 def main():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=500)        
-        page = browser.new_page()
+        browser = p.chromium.launch(headless=not DEMO, slow_mo=500 if DEMO else 0)
+        context = browser.new_context()
+        page = context.new_page()
         current_dir = os.path.dirname(os.path.abspath(__file__))
         html_file = os.path.join(current_dir,"form_demo.html")
-        page.goto(f"file://{html_file}")
+        page.goto(f"file://{html_file}", wait_until="domcontentloaded")
 
-        page.fill("input#name","Eric Yang")
-        page.fill("input#email","EricYang@mail.com")
-        page.select_option("select#country","Taiwan")
-        page.check("input#subscribe")
-        sleep(3)
+        if DEMO:
+            page.fill("input#name","Eric Yang")
+            page.fill("input#email","EricYang@mail.com")
+            page.select_option("select#country","Taiwan")
+            page.check("input#subscribe")
+            # 填完後停留一下再關閉，讓人看得到結果
+            page.wait_for_timeout(3000)
+        else:
+            # 一次 evaluate 填完整張表單，不用每個欄位各來回一次瀏覽器
+            page.evaluate("""() => {
+                const set = (selector, prop, value) => {
+                    const el = document.querySelector(selector);
+                    el[prop] = value;
+                    el.dispatchEvent(new Event('input', { bubbles: true }));
+                    el.dispatchEvent(new Event('change', { bubbles: true }));
+                };
+                set('input#name', 'value', 'Eric Yang');
+                set('input#email', 'value', 'EricYang@mail.com');
+                set('select#country', 'value', 'Taiwan');
+                set('input#subscribe', 'checked', true);
+            }""")
+        context.close()
         browser.close()
-      
+
 
 if __name__ =="__main__":
-    main()
\ No newline at end of file
+    main()
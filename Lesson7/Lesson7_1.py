@@ -2,6 +2,13 @@
 import asyncio
 from crawl4ai import AsyncWebCrawler
 
+# 有安裝 uvloop 就使用它
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 
 async def main():
     async with AsyncWebCrawler() as crawler:
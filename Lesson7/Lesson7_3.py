@@ -1,8 +1,6 @@
-import asyncio,json
-from crawl4ai import AsyncWebCrawler,CrawlerRunConfig,CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
+from selectolax.lexbor import LexborHTMLParser
 
-async def main():
+def main():
     # 模擬加密貨幣網頁
     html = """<html>
         <body>
@@ -28,49 +26,23 @@ async def main():
     </html> 
     """
 
-    schema ={
-        "name":"項目名稱",
-        "baseSelector":"div.product-card",
-        "fields":[
-            {
-                "name":"商品名",
-                "selector":"h2",
-                "type":"text"
-            },
-            
-            {
-                ##"baseSelector":"div.price-section"
-                "name":"特價",
-                "selector":"span.new-price",
-                "type":"text"
-            },
-            
-            {
-                ##"baseSelector":"div.price-section"
-                "name":"原價",
-                "selector":"span.old-price",
-                "type":"text"
-            },
-        
-        ]
-    }
+    # HTML 已經在程式裡，直接用 selectolax 解析，不需要經過瀏覽器與爬蟲
+    tree = LexborHTMLParser(html)
+    data = []
+    for card in tree.css("div.product-card"):
+        item = {
+            "商品名": card.css_first("h2").text(strip=True),
+            "特價": card.css_first("span.new-price").text(strip=True),
+        }
+        if (old_price := card.css_first("span.old-price")) is not None:
+            item["原價"] = old_price.text(strip=True)
+        data.append(item)
 
-    strategy = JsonCssExtractionStrategy(schema)
-
-    run_config = CrawlerRunConfig(
-        cache_mode=CacheMode.BYPASS,
-        extraction_strategy=strategy
-        )
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(
-            url=f"raw://{html}",
-            config=run_config)
-        data = json.loads(result.extracted_content)
-        for item in data:
-            print(f"商品:{item['商品名']}")
-            print(f"原價:{item.get('原價', '無')}")
-            print(f"特價: {item['特價']}")
-            print("=============")
+    for item in data:
+        print(f"商品:{item['商品名']}")
+        print(f"原價:{item.get('原價', '無')}")
+        print(f"特價: {item['特價']}")
+        print("=============")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
@@ -1,67 +1,259 @@
 import asyncio
-import json
+import threading
+import time
 from datetime import datetime
+import httpx
 import streamlit as st
 import pandas as pd
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
-
-
-@st.cache_data(ttl=600)  # 10分鐘快取
-def fetch_exchange_rates():
-    """爬取台灣銀行匯率資料"""
-    
-    async def _fetch():
-        schema = {
-            "name": "匯率資訊",
-            "baseSelector": "table[title='牌告匯率'] tr",
-            "fields": [
-                {
-                    "name": "幣別",
-                    "selector": "td[data-table='幣別'] div.print_show",
-                    "type": "text"
-                },
-                {
-                    "name": "本行即期買入",
-                    "selector": "td[data-table='本行即期買入']",
-                    "type": "text"
-                },
-                {
-                    "name": "本行即期賣出",
-                    "selector": "td[data-table='本行即期賣出']",
-                    "type": "text"
-                }
-            ]
+from selectolax.lexbor import LexborHTMLParser
+
+# POSIX 平台使用 uvloop 加快事件迴圈（Windows 無法安裝，維持預設）
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+# 匯率資料來源
+EXCHANGE_URL = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
+# 每次更新要抓取的網頁，由 _fetch_rates 並行下載
+URLS = [EXCHANGE_URL]
+
+
+@st.cache_resource(show_spinner=False)
+def _loop():
+    """建立共用的背景事件迴圈與執行緒
+    
+    Streamlit 每次重新整理都會重跑整個腳本，放在 cache_resource 中才會只建立一次。
+    有 uvloop 時直接建立 uvloop 迴圈，不設定全域的事件迴圈政策，
+    以免影響 Streamlit 自己的執行緒
+    """
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+
+def _run(coro):
+    """在共用事件迴圈上執行協程並等待結果"""
+    return asyncio.run_coroutine_threadsafe(coro, _loop()).result()
+
+
+# 牌告匯率表的欄位與 CSS 選擇器
+SCHEMA = {
+    "name": "匯率資訊",
+    "baseSelector": "table[title='牌告匯率'] tr",
+    "fields": [
+        {
+            "name": "幣別",
+            "selector": "td[data-table='幣別'] div.print_show",
+            "type": "text"
+        },
+        {
+            "name": "本行即期買入",
+            "selector": "td[data-table='本行即期買入']",
+            "type": "text"
+        },
+        {
+            "name": "本行即期賣出",
+            "selector": "td[data-table='本行即期賣出']",
+            "type": "text"
         }
+    ]
+}
 
-        strategy = JsonCssExtractionStrategy(schema)
-        run_config = CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            extraction_strategy=strategy
-        )
-        
-        async with AsyncWebCrawler() as crawler:
-            url = 'https://rate.bot.com.tw/xrt?Lang=zh-TW'
-            result = await crawler.arun(url=url, config=run_config)
-            data = json.loads(result.extracted_content)
-            return data
+# 解析時直接使用的選擇器與欄位名稱，於載入模組時由 SCHEMA 算好
+BASE_SELECTOR = SCHEMA["baseSelector"]
+FIELDS = tuple((field["name"], field["selector"]) for field in SCHEMA["fields"])
+COLUMNS = tuple(name for name, _ in FIELDS)
+
+
+def parse_exchange_rates(html):
+    """以預先整理好的 CSS 選擇器解析牌告匯率表"""
+    data = []
+    for tr in LexborHTMLParser(html).css(BASE_SELECTOR):
+        row = {}
+        for name, selector in FIELDS:
+            node = tr.css_first(selector)
+            row[name] = node.text(strip=True) if node else None
+        # 表頭等沒有幣別的列直接略過
+        if row["幣別"]:
+            data.append(row)
+    return data
+
+
+@st.cache_resource(show_spinner=False)
+def _semaphore():
+    """同時連線數上限（可依逾時情況調整），與事件迴圈一樣只建立一次"""
+    return asyncio.Semaphore(8)
+
+
+async def _new_client():
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=32,
+            max_keepalive_connections=16,
+            keepalive_expiry=60
+        ),
+        timeout=10.0
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def http_client():
+    """建立共用的 HTTP 連線池，重新整理時沿用 keep-alive 連線
     
-    # 執行非同步函數
-    data = asyncio.run(_fetch())
+    在 _loop() 的事件迴圈裡建立，之後也只在該迴圈上使用；
+    由 Streamlit 持有到程式結束，不需要自行關閉
+    """
+    return _run(_new_client())
+
+
+async def _fetch_rates(client, sem, urls):
+    """以 HTTP 並行抓取並解析多個網頁（牌告匯率為靜態網頁，不需要啟動瀏覽器）
+    
+    解析在執行緒中進行，不會阻塞事件迴圈上其他網頁的下載
+    """
+    async def bounded(url):
+        async with sem:
+            response = await client.get(url)
+        response.raise_for_status()
+        return await asyncio.to_thread(parse_exchange_rates, response.text)
+
+    pages = await asyncio.gather(*(bounded(url) for url in urls))
+    return [row for rows in pages for row in rows]
+
+
+REFRESH_SECONDS = 600  # 10分鐘更新一次
+
+
+@st.cache_data(persist="disk", max_entries=1)
+def load_exchange_rates(time_slot):
+    """爬取台灣銀行匯率資料，保存到磁碟供重新啟動後沿用
+    
+    persist="disk" 不支援 ttl，因此以 time_slot（每 10 分鐘遞增）作為快取鍵。
+    快取沒命中才會執行函式本體，也就是進入新時段；此時先清除舊時段的
+    記憶體與磁碟快取（max_entries 只限制記憶體，不會刪除磁碟上的檔案）
+    """
+    load_exchange_rates.clear()
+    data = _run(_fetch_rates(http_client(), _semaphore(), URLS))
+    # 以例外結束就不會寫入快取，錯誤頁面解析出的空白結果不會被保存一整個時段
+    if not data:
+        raise ValueError("匯率網頁沒有可解析的資料")
+    return data
+
+
+def current_time_slot():
+    """目前的 10 分鐘時段編號"""
+    return int(time.time() // REFRESH_SECONDS)
+
+
+@st.cache_resource(max_entries=1)
+def fetch_exchange_rates(time_slot):
+    """取得匯率資料，整理為 DataFrame、可交易幣別清單及以幣別為鍵的匯率字典
+    
+    同一時段內所有重新整理共用同一份結果，不必重複建立 DataFrame
+    """
+    data = load_exchange_rates(time_slot)
     
     # 轉換為 DataFrame
-    df = pd.DataFrame(data)
+    df = pd.DataFrame.from_records(data, columns=COLUMNS).astype("string[pyarrow]")
     
     # 處理資料
     if not df.empty:
+        buy, sell = '本行即期買入', '本行即期賣出'
+        bad_buy = df[buy].isna() | (df[buy] == '')
+        bad_sell = df[sell].isna() | (df[sell] == '')
+        
         # 處理空值顯示為「暫停交易」
-        df['本行即期買入'] = df['本行即期買入'].replace('', '暫停交易').fillna('暫停交易')
-        df['本行即期賣出'] = df['本行即期賣出'].replace('', '暫停交易').fillna('暫停交易')
+        df[buy] = df[buy].mask(bad_buy, '暫停交易')
+        df[sell] = df[sell].mask(bad_sell, '暫停交易')
         
         # 過濾掉無法交易的貨幣（買入和賣出都是暫停交易的）
-        df = df[~((df['本行即期買入'] == '暫停交易') & (df['本行即期賣出'] == '暫停交易'))]
+        df = df[~(bad_buy & bad_sell)]
+    
+    # 以幣別為鍵建立索引，選擇幣別時不必再逐列比對
+    # 賣出匯率預先轉成數值，暫停交易等無法轉換的值為 NaN
+    sell_rate_f = pd.to_numeric(
+        df['本行即期賣出'].str.replace(',', '', regex=False),
+        errors='coerce'
+    )
+    rate_map = (
+        df.assign(sell_rate_f=sell_rate_f)
+        .set_index('幣別')[['本行即期買入', '本行即期賣出', 'sell_rate_f']]
+        .to_dict('index')
+    )
+    
+    # 買入和賣出都暫停交易的貨幣已在上面濾掉，剩下的都可交易
+    currencies = df['幣別'].tolist()
     
-    return df
+    return df, currencies, rate_map
+
+
+@st.fragment
+def calculator(rate_map, currencies):
+    """台幣轉換計算器
+    
+    以 fragment 執行，輸入金額或切換幣別時只重新執行這個區塊，不會重跑爬蟲與表格
+    """
+    # 輸入台幣金額
+    twd_amount = st.number_input(
+        "輸入台幣金額 (TWD)",
+        min_value=0.0,
+        value=10000.0,
+        step=100.0,
+        format="%.2f"
+    )
+
+    # 選擇目標貨幣
+    selected_currency = st.selectbox(
+        "選擇目標貨幣",
+        currencies
+    )
+
+    # 計算轉換
+    if selected_currency:
+        selected_row = rate_map[selected_currency]
+
+        st.markdown("---")
+        st.markdown(f"### 📈 {selected_currency} 匯率資訊")
+
+        # 顯示匯率資訊
+        col_buy, col_sell = st.columns(2)
+
+        with col_buy:
+            buy_rate = selected_row['本行即期買入']
+            st.metric(
+                "本行買入",
+                buy_rate if buy_rate != '暫停交易' else '暫停交易'
+            )
+
+        with col_sell:
+            sell_rate = selected_row['本行即期賣出']
+            st.metric(
+                "本行賣出",
+                sell_rate if sell_rate != '暫停交易' else '暫停交易'
+            )
+
+        st.markdown("---")
+        st.markdown("### 💵 轉換結果")
+
+        # 計算轉換金額（使用銀行賣出匯率，因為客戶是買外幣）
+        if sell_rate != '暫停交易':
+            sell_rate_float = selected_row['sell_rate_f']
+            if pd.isna(sell_rate_float):
+                st.error("❌ 匯率資料格式錯誤")
+            else:
+                foreign_amount = twd_amount / sell_rate_float
+
+                st.success(
+                    f"**{twd_amount:,.2f} TWD** = "
+                    f"**{foreign_amount:,.4f} {selected_currency}**"
+                )
+
+                st.caption(f"使用匯率：{sell_rate_float:.4f} (本行賣出)")
+        else:
+            st.warning("⚠️ 此貨幣暫停交易")
 
 
 def main():
@@ -79,6 +271,7 @@ def main():
     with col_update:
         if st.button("🔄 手動更新", use_container_width=True):
             st.cache_data.clear()
+            fetch_exchange_rates.clear()
             st.rerun()
     
     # 顯示更新時間
@@ -86,7 +279,7 @@ def main():
     
     # 獲取匯率資料
     try:
-        df = fetch_exchange_rates()
+        df, currencies, rate_map = fetch_exchange_rates(current_time_slot())
         
         if df.empty:
             st.error("❌ 無法取得匯率資料")
@@ -109,75 +302,11 @@ def main():
         with col2:
             st.subheader("💰 台幣轉換計算器")
             
-            # 過濾可交易的貨幣（至少有一個欄位不是暫停交易）
-            tradable_df = df[
-                (df['本行即期買入'] != '暫停交易') | 
-                (df['本行即期賣出'] != '暫停交易')
-            ].copy()
-            
-            if tradable_df.empty:
+            if not currencies:
                 st.warning("⚠️ 目前沒有可交易的貨幣")
                 return
             
-            # 輸入台幣金額
-            twd_amount = st.number_input(
-                "輸入台幣金額 (TWD)",
-                min_value=0.0,
-                value=10000.0,
-                step=100.0,
-                format="%.2f"
-            )
-            
-            # 選擇目標貨幣
-            currency_list = tradable_df['幣別'].tolist()
-            selected_currency = st.selectbox(
-                "選擇目標貨幣",
-                currency_list
-            )
-            
-            # 計算轉換
-            if selected_currency:
-                selected_row = tradable_df[tradable_df['幣別'] == selected_currency].iloc[0]
-                
-                st.markdown("---")
-                st.markdown(f"### 📈 {selected_currency} 匯率資訊")
-                
-                # 顯示匯率資訊
-                col_buy, col_sell = st.columns(2)
-                
-                with col_buy:
-                    buy_rate = selected_row['本行即期買入']
-                    st.metric(
-                        "本行買入",
-                        buy_rate if buy_rate != '暫停交易' else '暫停交易'
-                    )
-                    
-                with col_sell:
-                    sell_rate = selected_row['本行即期賣出']
-                    st.metric(
-                        "本行賣出",
-                        sell_rate if sell_rate != '暫停交易' else '暫停交易'
-                    )
-                
-                st.markdown("---")
-                st.markdown("### 💵 轉換結果")
-                
-                # 計算轉換金額（使用銀行賣出匯率，因為客戶是買外幣）
-                if sell_rate != '暫停交易':
-                    try:
-                        sell_rate_float = float(sell_rate)
-                        foreign_amount = twd_amount / sell_rate_float
-                        
-                        st.success(
-                            f"**{twd_amount:,.2f} TWD** = "
-                            f"**{foreign_amount:,.4f} {selected_currency}**"
-                        )
-                        
-                        st.caption(f"使用匯率：{sell_rate_float:.4f} (本行賣出)")
-                    except ValueError:
-                        st.error("❌ 匯率資料格式錯誤")
-                else:
-                    st.warning("⚠️ 此貨幣暫停交易")
+            calculator(rate_map, currencies)
     
     except Exception as e:
         st.error(f"❌ 發生錯誤：{str(e)}")
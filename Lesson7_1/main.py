@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
 import time
-from crawl4ai import CrawlerRunConfig, CacheMode, JsonCssExtractionStrategy, AsyncWebCrawler
+import httpx
+from selectolax.lexbor import LexborHTMLParser
 import asyncio
+import threading
+
+# 有 uvloop 時讓背景事件迴圈改用 uvloop（Windows 沒有 uvloop）
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # 匯率資料來源（以台灣銀行匯率網頁為例，可依實際需求更換）
 EXCHANGE_URL = "https://rate.bot.com.tw/xrt?Lang=zh-TW"
@@ -20,17 +28,92 @@ schema = {
     ]
 }
 
-# 取得匯率資料
-@st.cache_data(ttl=600, show_spinner=True)
-def get_rates():
-    strategy = JsonCssExtractionStrategy(schema)
-    run_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, extraction_strategy=strategy)
-    async def fetch():
-        async with AsyncWebCrawler() as crawler:
-            result = await crawler.arun(url=EXCHANGE_URL, config=run_config)
-            data = pd.DataFrame(eval(result.extracted_content))
-            return data
-    return asyncio.run(fetch())
+# 共用的背景事件迴圈，非同步連線都綁定在這個迴圈上
+# Streamlit 每次互動都會重跑整個腳本，所以迴圈與執行緒要用 cache_resource 只建立一次
+@st.cache_resource(show_spinner=False)
+def _loop():
+    # 只建立這一個迴圈時使用 uvloop，不更動整個 Streamlit 程序的事件迴圈政策
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def _run(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _loop()).result()
+
+# schema 在載入時攤平成選擇器清單
+BASE_SELECTOR = schema["baseSelector"]
+FIELDS = tuple((field["name"], field["selector"]) for field in schema["fields"])
+
+# 解析匯率表每一列，表頭等沒有幣別的列略過
+def parse_rates(html):
+    rows = []
+    for tr in LexborHTMLParser(html).css(BASE_SELECTOR):
+        nodes = ((name, tr.css_first(selector)) for name, selector in FIELDS)
+        row = {name: node.text(strip=True) if node else None for name, node in nodes}
+        if row["幣別"]:
+            rows.append(row)
+    return rows
+
+# 要抓取的匯率網頁（目前只有牌告匯率）
+URLS = [EXCHANGE_URL]
+
+# 最多同時 8 個請求；台銀回應逾時變多時再調低
+@st.cache_resource(show_spinner=False)
+def semaphore():
+    return asyncio.Semaphore(8)
+
+async def _new_client():
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60),
+        timeout=10.0,
+    )
+
+# 共用的 HTTP 連線池，重新整理時沿用既有的 keep-alive 連線（不需關閉，隨程式結束釋放）
+# 在共用事件迴圈裡建立，連線只會在這個迴圈上使用
+@st.cache_resource(show_spinner=False)
+def http_client():
+    return _run(_new_client())
+
+# 抓取並解析所有網頁；解析交給執行緒，其他網頁的下載可同時進行
+async def fetch_rates(client, sem, urls):
+    async def bounded(url):
+        async with sem:
+            response = await client.get(url)
+        response.raise_for_status()
+        return await asyncio.to_thread(parse_rates, response.text)
+    pages = await asyncio.gather(*(bounded(url) for url in urls))
+    return [row for rows in pages for row in rows]
+
+# 每 10 分鐘更新一次
+REFRESH_SECONDS = 600
+
+# 爬取結果存到磁碟，重新啟動後仍可沿用
+# 快取鍵是 10 分鐘的時段編號（磁碟快取會忽略 ttl）
+@st.cache_data(persist="disk", max_entries=1, show_spinner=True)
+def load_rates(time_slot):
+    # 進到這裡代表換了新時段，先刪掉舊時段的檔案
+    load_rates.clear()
+    rows = _run(fetch_rates(http_client(), semaphore(), URLS))
+    # 沒有資料就當作失敗，不寫入快取
+    if not rows:
+        raise ValueError("匯率網頁沒有可解析的資料")
+    return rows
+
+# 匯率表欄位
+COLS = tuple(name for name, _ in FIELDS)
+
+def current_time_slot():
+    return int(time.time() // REFRESH_SECONDS)
+
+# 把快取的資料列建成 DataFrame（字串欄位用 PyArrow），每個時段只建一次
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_rates(time_slot):
+    data = load_rates(time_slot)
+    rates = pd.DataFrame.from_records(data, columns=COLS).astype("string[pyarrow]")
+    # 即期賣出預先轉成數值，無法轉換（例如 "-"）的值為 NaN
+    rates["即期賣出_f"] = pd.to_numeric(rates["即期賣出"].str.replace(",", "", regex=False), errors="coerce")
+    return rates
 
 # Streamlit 介面
 st.set_page_config(page_title="台幣匯率轉換", layout="wide")
@@ -40,29 +123,37 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.header("台幣轉換計算")
-    rates = get_rates()
+    try:
+        rates = get_rates(current_time_slot())
+    except (httpx.HTTPError, ValueError) as e:
+        st.error(f"無法取得匯率資料：{e}")
+        st.stop()
     # 過濾可交易幣別
     tradable = rates[rates["即期賣出"].str.strip() != "-"]
     tradable = tradable.reset_index(drop=True)
+    if tradable.empty:
+        st.warning("目前沒有可交易的幣別")
+        st.stop()
     currency = st.selectbox("選擇幣別", tradable["幣別"])
     amount = st.number_input("請輸入台幣金額", min_value=1, value=1000)
-    rate = tradable.loc[tradable["幣別"] == currency, "即期賣出"].values[0]
-    try:
-        rate = float(rate.replace(",", ""))
+    rate = tradable.loc[tradable["幣別"] == currency, "即期賣出_f"].values[0]
+    if pd.notna(rate) and rate > 0:
         result = amount / rate
         st.success(f"{amount} 台幣可兌換 {result:.2f} {currency}")
-    except:
+    else:
         st.warning("暫停交易")
     if st.button("手動更新匯率"):
         st.cache_data.clear()
+        get_rates.clear()
         st.experimental_rerun()
 
 with col2:
     st.header("匯率表格")
     show = rates.copy()
+    cols = ["現金買入", "現金賣出", "即期買入", "即期賣出"]
+    stripped = show[cols].apply(lambda s: s.str.strip())
     # 空值顯示暫停交易
-    for col in ["現金買入", "現金賣出", "即期買入", "即期賣出"]:
-        show[col] = show[col].apply(lambda x: x if x.strip() != "-" else "暫停交易")
+    show[cols] = show[cols].mask(stripped == "-", "暫停交易")
     # 只顯示可交易幣別
-    show = show[show["即期賣出"] != "-"]
+    show = show[stripped["即期賣出"] != "-"]
     st.dataframe(show[["幣別", "現金買入", "現金賣出", "即期買入", "即期賣出"]], use_container_width=True)